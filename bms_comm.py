@@ -1,27 +1,37 @@
 import serial
 import socket
 import logging
+import os
 
 class BMSCommunication:
-    def __init__(self, interface='serial', serial_port=None, baud_rate=None, ethernet_ip=None, ethernet_port=None,buffer_size=1024,debug=0):
+    def __init__(self, interface='serial', serial_port=None, baud_rate=None, ethernet_ip=None, ethernet_port=None,buffer_size=1024,debug=0,serial_timeout=3,socket_timeout=3):
         self.interface = interface
         self.serial_port = serial_port
         self.baud_rate = baud_rate
         self.ethernet_ip = ethernet_ip
         self.ethernet_port = ethernet_port
         self.buffer_size = buffer_size
+        self.serial_timeout = serial_timeout
+        self.socket_timeout = socket_timeout
+        # Receive buffer reused for every frame, a response never exceeds buffer_size
+        self.rx_buffer = bytearray(buffer_size)
+        self.rx_view = memoryview(self.rx_buffer)
         self.bms_connection = None
+        # Bound once in connect() so send/receive don't have to probe the connection type
+        self._send = None
+        self._recv = None
 
-        # Configure logging
-        logging.basicConfig(level=logging.DEBUG if debug else logging.INFO,
-                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
 
     def connect(self):
         if self.interface == 'serial' and self.serial_port and self.baud_rate:
             try:
                 self.logger.info(f"Trying to connect BMS over {self.serial_port}:{self.baud_rate}")
-                self.bms_connection = serial.Serial(self.serial_port, self.baud_rate, timeout=3)
+                self.bms_connection = serial.Serial(self.serial_port, self.baud_rate, timeout=self.serial_timeout)
+                self._set_serial_low_latency()
+                self._send = self.bms_connection.write
+                self._recv = self._receive_serial_frame
                 self.logger.info(f"Connected to BMS over serial port: {self.serial_port} with baud rate: {self.baud_rate}")
                 self.logger.info("Please ensure the Baud Rate is correctly set. An incorrect baud rate may not raise an immediate error, but it can lead to communication failures or corrupted data.")
 
@@ -33,8 +43,14 @@ class BMSCommunication:
             try:
                 self.logger.info(f"Trying to connect BMS over {self.ethernet_ip}:{self.ethernet_port}")
                 self.bms_connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.bms_connection.settimeout(3)
+                self.bms_connection.settimeout(self.socket_timeout)
+                # Send short request frames immediately instead of waiting for delayed ACKs
+                self.bms_connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
                 self.bms_connection.connect((self.ethernet_ip, self.ethernet_port))
+                if hasattr(socket, 'TCP_QUICKACK'):
+                    self.bms_connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+                self._send = self.bms_connection.sendall
+                self._recv = self._receive_tcp_frame
                 self.logger.info(f"Connected to BMS over Ethernet: {self.ethernet_ip}:{self.ethernet_port}")
                 return self.bms_connection
             except socket.error as e:
@@ -44,6 +60,21 @@ class BMSCommunication:
             self.logger.error("Invalid parameters or interface selection.")
             return None
 
+    def _set_serial_low_latency(self):
+        # USB-serial adapters hold back short reads for up to 16 ms by default (latency_timer)
+        device = os.path.basename(os.path.realpath(self.serial_port))
+        try:
+            with open(f"/sys/bus/usb-serial/devices/{device}/latency_timer", 'w') as file:
+                file.write('1')
+        except OSError:
+            pass
+
+        # Set ASYNC_LOW_LATENCY on the tty, only supported on Linux
+        try:
+            self.bms_connection.set_low_latency_mode(True)
+        except (AttributeError, ValueError, OSError) as e:
+            self.logger.debug(f"Low latency mode not available on {self.serial_port}: {e}")
+
 
     def disconnect(self):
         if self.bms_connection:
@@ -63,6 +94,8 @@ class BMSCommunication:
             
             # Set connection to None after closing it.
             self.bms_connection = None
+            self._send = None
+            self._recv = None
         else:
             self.logger.warning("No active connection to disconnect.")
 
@@ -75,14 +108,9 @@ class BMSCommunication:
             if isinstance(data, str):
                 data = data.encode()  # Convert string to bytes if necessary
 
-            # Check if the connection is a socket (Ethernet)
-            if hasattr(self.bms_connection, 'send'):
-                self.bms_connection.send(data)
-            # Check if the connection is a serial connection
-            elif hasattr(self.bms_connection, 'write'):
-                self.bms_connection.write(data)
-            else:
+            if self._send is None:
                 raise ValueError("Unsupported connection type")
+            self._send(data)
             return True
 
         except Exception as e:
@@ -90,21 +118,76 @@ class BMSCommunication:
             self.connect()
             return False
 
+    def _receive_serial_frame(self):
+        # Frames end with EOI (\r), readline() would keep waiting for a \n until the timeout expires.
+        # Read whatever has arrived into the preallocated buffer (at least one byte, so the read still
+        # waits for data up to the timeout) instead of read_until() fetching a byte per call
+        pos = 0
+        while pos < self.buffer_size:
+            wanted = min(max(1, self.bms_connection.in_waiting), self.buffer_size - pos)
+            received = self.bms_connection.readinto(self.rx_view[pos:pos + wanted])
+            if not received:
+                break
+            end = self.rx_buffer.find(b'\r', pos, pos + received)
+            pos += received
+            if end != -1:
+                return bytes(self.rx_view[:end + 1])
+        return bytes(self.rx_view[:pos])
+
+    def _expected_frame_length(self):
+        # SOI(1) VER(2) ADR(2) CID1(2) RTN(2) LENGTH(4) INFO(LENID) CHKSUM(4) EOI(1),
+        # LENID is the low 12 bits of LENGTH. Returns 0 when the header is not usable.
+        if self.rx_buffer[0] != 0x7E:
+            return 0
+        try:
+            lenid = int(self.rx_buffer[10:13], 16)
+        except ValueError:
+            return 0
+        return min(18 + lenid, self.buffer_size)
+
+    def _receive_tcp_frame(self):
+        # Read straight into the preallocated buffer, no intermediate bytes object per recv.
+        # Once the header is in, stop as soon as the announced frame length has arrived; stop at EOI (\r)
+        # in any case, a LENGTH field that promises more than the BMS sends must not hold us until the timeout
+        pos = 0
+        expected = None
+        while pos < self.buffer_size:
+            received = self.bms_connection.recv_into(self.rx_view[pos:])
+            if not received:
+                break
+            chunk_start = pos
+            pos += received
+            if expected is None and pos >= 13:
+                expected = self._expected_frame_length()
+            if expected and pos >= expected and self.rx_buffer[expected - 1] == 0x0D:
+                return bytes(self.rx_view[:expected])
+            end = self.rx_buffer.find(b'\r', chunk_start, pos)
+            if end != -1:
+                if expected and end + 1 != expected:
+                    self.logger.debug("Frame length does not match LENGTH field, using EOI")
+                return bytes(self.rx_view[:end + 1])
+        return bytes(self.rx_view[:pos])
+
+    def _checksum_valid(self, frame):
+        # CHKSUM is the two's complement (mod 65536) of the sum of the ASCII bytes between SOI and CHKSUM
+        try:
+            return int(frame[-4:], 16) == (-sum(frame[1:-4]) & 0xFFFF)
+        except ValueError:
+            return False
+
     def receive_data(self):
         try:
-            # Check if the connection is a serial connection
-            if hasattr(self.bms_connection, 'readline'):
-                raw_data = self.bms_connection.readline()
-                received_data = raw_data.decode().strip()
-            # Check if the connection is a socket (Ethernet)
-            elif hasattr(self.bms_connection, 'recv'):
-                # Assuming a buffer size of 1024 bytes for demonstration purposes
-                raw_data = self.bms_connection.recv(self.buffer_size)
-                received_data = raw_data.decode().strip()
-            else:
+            if self._recv is None:
                 raise ValueError("Unsupported connection type")
+            raw_data = self._recv()
+            frame = raw_data.strip()
+            if frame[:1] == b'~' and not self._checksum_valid(frame):
+                self.logger.warning(f"Checksum mismatch, dropping frame: {frame}")
+                return None
+            # Frames are pure ASCII hex, so skip the UTF-8 multi-byte handling
+            received_data = frame.decode('ascii')
 
-            self.logger.debug(f"Received data from BMS: {received_data}")
+            self.logger.debug("Received data from BMS: %s", received_data)
             return received_data
         except Exception as e:
             # Log the raw data when there is a decoding error
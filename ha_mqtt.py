@@ -1,6 +1,34 @@
 import paho.mqtt.client as mqtt
 import json
 import logging
+import socket
+import functools
+import math
+from json.encoder import encode_basestring_ascii
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Binary sensor states are plain booleans, so their payloads never change
+BINARY_SENSOR_ON = json.dumps({"state": True})
+BINARY_SENSOR_OFF = json.dumps({"state": False})
+
+# State payload layouts, filled in directly for plain numbers and strings instead of going through json.dumps
+SENSOR_STATE_TEMPLATE = '{"state": %s, "attributes": {"unit_of_measurement": %s}}'
+WARN_STATE_TEMPLATE = '{"state": %s}'
+EVENT_STATE_TEMPLATE = '{"event_type": %s}'
+
+def dumps(obj):
+    # orjson is several times faster and returns bytes, which paho publishes without re-encoding
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'))
+
+@functools.lru_cache(maxsize=4096)
+def display_name(entity_id):
+    # pack_01_cell_voltage_03 -> Pack 01 Cell Voltage 03
+    return " ".join(word[:1].upper() + word[1:] for word in entity_id.split("_"))
 
 class HA_MQTT:
 
@@ -13,11 +41,15 @@ class HA_MQTT:
         self.device_name = device_name
         self.device_info = device_info
         self.mqtt_client = None
+        # Last discovery payload published per config topic, discovery is retained so it only needs resending on change
+        self.published_discovery = {}
+        # Serialized discovery (topic, payload) per entity, only device_info can change them
+        self.discovery_payloads = {}
+        # State topic per (component, entity_id), built on first use
+        self.state_topics = {}
 
-        # Configure logging
-        logging.basicConfig(level=logging.DEBUG if debug else logging.INFO,
-                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
 
     def update_device_info(self, new_device_info):
         """
@@ -26,31 +58,90 @@ class HA_MQTT:
         :param new_device_info: The new device information to update with.
         """
         self.device_info = new_device_info
+        self.discovery_payloads.clear()
         self.logger.debug(f"Updated device_info to: {new_device_info}")
 
     def cap_first(self,s):
-        if not s:
-            return s  # Return the empty string if input is empty
-        return s[0].upper() + s[1:]
+        return s[:1].upper() + s[1:]
 
     def connect(self):
         self.logger.debug("Initializing MQTT client")
-        self.mqtt_client = mqtt.Client()
+        # A fixed client id lets the broker recognise the add-on across restarts instead of registering a new random client each time
+        client_id = f"gobel_{self.device_name}"
+        # paho-mqtt 2.x deprecates the implicit VERSION1 callback API, older releases have no CallbackAPIVersion
+        if hasattr(mqtt, 'CallbackAPIVersion'):
+            self.mqtt_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+        else:
+            self.mqtt_client = mqtt.Client(client_id=client_id)
         self.mqtt_client.username_pw_set(self.mqtt_user, self.mqtt_password)
+        self.mqtt_client.on_connect = self.on_connect
+        self.mqtt_client.on_message = self.on_message
+        self.mqtt_client.on_disconnect = self.on_disconnect
         self.logger.info(f"Connecting to MQTT broker at {self.mqtt_broker}:{self.mqtt_port}")
         try:
             self.mqtt_client.connect(self.mqtt_broker, self.mqtt_port, 60)
-            self.logger.info("Connected to MQTT broker successfully")
         except Exception as e:
             self.logger.error(f"Failed to connect to MQTT broker: {e}")
+            return None
+        # publish() only queues the packet, the network thread writes it out (and reconnects after a drop)
+        self.mqtt_client.loop_start()
         return self.mqtt_client
 
+    def on_connect(self, client, userdata, flags, *args):
+        # VERSION1 passes (rc[, properties]), VERSION2 passes (reason_code, properties)
+        reason = args[0]
+        if reason.is_failure if hasattr(reason, 'is_failure') else reason != 0:
+            self.logger.error(f"MQTT broker refused the connection: {reason}")
+            return
+        self.logger.info("Connected to MQTT broker successfully")
+        # A (re)connect may be to a broker that lost the retained configs, so send everything again
+        self.published_discovery.clear()
+        # Discovery goes out as a burst of small retained messages, don't let Nagle hold them back
+        try:
+            client.socket().setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (AttributeError, OSError) as e:
+            self.logger.debug(f"Could not set TCP_NODELAY on the MQTT socket: {e}")
+        # Home Assistant announces itself on <discovery prefix>/status when it restarts
+        client.subscribe(f"{self.host_name}/status")
+
+    def on_disconnect(self, client, userdata, *args):
+        # VERSION1 passes (rc[, properties]), VERSION2 passes (flags, reason_code, properties)
+        reason = args[1] if len(args) == 3 else args[0]
+        self.logger.warning(f"Disconnected from MQTT broker ({reason}), state updates are dropped until paho reconnects")
+
+    def on_message(self, client, userdata, message):
+        if message.topic == f"{self.host_name}/status" and message.payload == b"online":
+            self.published_discovery.clear()
+
+    def state_topic(self, main_topic, entity_id):
+        topic = self.state_topics.get((main_topic, entity_id))
+        if topic is None:
+            topic = self.state_topics[(main_topic, entity_id)] = f"{main_topic}/{self.device_name}_{entity_id}/state"
+        return topic
+
+    def publish_discovery(self, topic, payload):
+        if self.published_discovery.get(topic) == payload:
+            return
+        try:
+            result = self.mqtt_client.publish(topic, payload, retain=True)
+            if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                self.published_discovery[topic] = payload
+                # Only reached when a config actually changed, so this stays quiet in steady state
+                self.logger.debug("Published discovery for %s: %s", topic, payload)
+        except Exception as e:
+            self.logger.error(f"Failed to publish discovery for {topic}: {e}")
+
     def publish_sensor_discovery(self, entity_id, unit, icon, deviceclass, stateclass):
+        key = ('sensor', entity_id, unit, icon, deviceclass, stateclass)
+        if key in self.discovery_payloads:
+            self.publish_discovery(*self.discovery_payloads[key])
+            return
+
         main_topic = 'sensor'
         topic = f"{self.host_name}/{main_topic}/{self.device_name}_{entity_id}/config"
         # self.logger.debug(f"Publishing discovery to topic: {topic}")
         payload = {
-            "name": " ".join(self.cap_first(word) for word in entity_id.split("_")),
+            "name": display_name(entity_id),
             "state_topic": f"{main_topic}/{self.device_name}_{entity_id}/state",
             "unique_id": f"{self.device_name}_{entity_id}",
             "unit_of_measurement": unit,
@@ -64,33 +155,34 @@ class HA_MQTT:
             payload["device_class"] = deviceclass
         # self.logger.debug(f"Discovery payload: {json.dumps(payload)}")
 
-        try:
-            self.mqtt_client.publish(topic, json.dumps(payload), retain=True)
-            # self.logger.debug(f"Published discovery for {topic}")
-        except Exception as e:
-            self.logger.error(f"Failed to publish discovery for {topic}: {e}")
+        self.discovery_payloads[key] = (topic, dumps(payload))
+        self.publish_discovery(*self.discovery_payloads[key])
 
     def publish_sensor_state(self, value, unit, entity_id):
-        main_topic = 'sensor'
-        topic = f"{main_topic}/{self.device_name}_{entity_id}/state"
+        topic = self.state_topic('sensor', entity_id)
         # self.logger.debug(f"Publishing data to topic: {topic}")
-        payload = {
-            "state": value,
-            "attributes": {"unit_of_measurement": unit}
-        }
-        # self.logger.debug(f"Data payload: {json.dumps(payload)}")
-        try:
-            self.mqtt_client.publish(topic, json.dumps(payload))
-            # self.logger.debug(f"Published data for {topic}")
-        except Exception as e:
-            self.logger.error(f"Failed to publish data for {topic}: {e}")
+        if type(value) in (int, float) and type(unit) is str and math.isfinite(value):
+            payload = SENSOR_STATE_TEMPLATE % (value, encode_basestring_ascii(unit))
+        else:
+            payload = dumps({
+                "state": value,
+                "attributes": {"unit_of_measurement": unit}
+            })
+        # self.logger.debug(f"Data payload: {payload}")
+        # publish() only queues the message, connection problems are reported through on_disconnect
+        self.mqtt_client.publish(topic, payload)
 
     def publish_event_discovery(self, entity_id):
+        key = ('event', entity_id)
+        if key in self.discovery_payloads:
+            self.publish_discovery(*self.discovery_payloads[key])
+            return
+
         main_topic = 'event'
         topic = f"{self.host_name}/{main_topic}/{self.device_name}_{entity_id}/config"
         # self.logger.debug(f"Publishing discovery to topic: {topic}")
         payload = {
-            "name": " ".join(self.cap_first(word) for word in entity_id.split("_")),
+            "name": display_name(entity_id),
             "state_topic": f"{main_topic}/{self.device_name}_{entity_id}/state",
             "unique_id": f"{self.device_name}_{entity_id}",
             "event_types": ["normal", 
@@ -103,33 +195,31 @@ class HA_MQTT:
             "device": self.device_info
         }
         # self.logger.debug(f"Discovery payload: {json.dumps(payload)}")
-        try:
-            self.mqtt_client.publish(topic, json.dumps(payload), retain=True)
-            # self.logger.debug(f"Published discovery for {topic}")
-        except Exception as e:
-            self.logger.error(f"Failed to publish discovery for {topic}: {e}")
+        self.discovery_payloads[key] = (topic, dumps(payload))
+        self.publish_discovery(*self.discovery_payloads[key])
 
 
     def publish_event_state(self, value, entity_id):
-        main_topic = 'event'
-        topic = f"{main_topic}/{self.device_name}_{entity_id}/state"
+        topic = self.state_topic('event', entity_id)
         # self.logger.debug(f"Publishing data to topic: {topic}")
-        payload = {
-            "event_type": value
-        }
-        # self.logger.debug(f"Data payload: {json.dumps(payload)}")
-        try:
-            self.mqtt_client.publish(topic, json.dumps(payload))
-            # self.logger.debug(f"Published data for {topic}")
-        except Exception as e:
-            self.logger.error(f"Failed to publish data for {topic}: {e}")
+        if type(value) is str:
+            payload = EVENT_STATE_TEMPLATE % encode_basestring_ascii(value)
+        else:
+            payload = dumps({"event_type": value})
+        # self.logger.debug(f"Data payload: {payload}")
+        self.mqtt_client.publish(topic, payload)
 
     def publish_binary_sensor_discovery(self, entity_id, icon):
+        key = ('binary_sensor', entity_id, icon)
+        if key in self.discovery_payloads:
+            self.publish_discovery(*self.discovery_payloads[key])
+            return
+
         main_topic = 'binary_sensor'
         topic = f"{self.host_name}/{main_topic}/{self.device_name}_{entity_id}/config"
         # self.logger.debug(f"Publishing discovery to topic: {topic}")
         payload = {
-            "name": " ".join(self.cap_first(word) for word in entity_id.split("_")),
+            "name": display_name(entity_id),
             "state_topic": f"{main_topic}/{self.device_name}_{entity_id}/state",
             "unique_id": f"{self.device_name}_{entity_id}",
             "payload_on": True,
@@ -139,34 +229,34 @@ class HA_MQTT:
             "device": self.device_info
         }
         # self.logger.debug(f"Discovery payload: {json.dumps(payload)}")
-        try:
-            self.mqtt_client.publish(topic, json.dumps(payload), retain=True)
-            # self.logger.debug(f"Published discovery for {topic}")
-        except Exception as e:
-            self.logger.error(f"Failed to publish discovery for {topic}: {e}")
+        self.discovery_payloads[key] = (topic, dumps(payload))
+        self.publish_discovery(*self.discovery_payloads[key])
 
 
     def publish_binary_sensor_state(self, value, entity_id):
-        main_topic = 'binary_sensor'
-        topic = f"{main_topic}/{self.device_name}_{entity_id}/state"
+        topic = self.state_topic('binary_sensor', entity_id)
         # self.logger.debug(f"Publishing data to topic: {topic}")
-        payload = {
-            "state": value
-        }
-        # self.logger.debug(f"Data payload: {json.dumps(payload)}")
-        try:
-            self.mqtt_client.publish(topic, json.dumps(payload))
-            # self.logger.debug(f"Published data for {topic}")
-        except Exception as e:
-            self.logger.error(f"Failed to publish data for {topic}: {e}")
+        if value is True:
+            payload = BINARY_SENSOR_ON
+        elif value is False:
+            payload = BINARY_SENSOR_OFF
+        else:
+            payload = dumps({"state": value})
+        # self.logger.debug(f"Data payload: {payload}")
+        self.mqtt_client.publish(topic, payload)
 
 
     def publish_warn_discovery(self, entity_id, icon):
+        key = ('warn', entity_id, icon)
+        if key in self.discovery_payloads:
+            self.publish_discovery(*self.discovery_payloads[key])
+            return
+
         main_topic = 'sensor'
         topic = f"{self.host_name}/{main_topic}/{self.device_name}_{entity_id}/config"
         # self.logger.debug(f"Publishing discovery to topic: {topic}")
         payload = {
-            "name": " ".join(self.cap_first(word) for word in entity_id.split("_")),
+            "name": display_name(entity_id),
             "state_topic": f"{main_topic}/{self.device_name}_{entity_id}/state",
             "unique_id": f"{self.device_name}_{entity_id}",
             "icon": icon,
@@ -174,26 +264,19 @@ class HA_MQTT:
             "device": self.device_info
         }
         # self.logger.debug(f"Discovery payload: {json.dumps(payload)}")
-        try:
-            self.mqtt_client.publish(topic, json.dumps(payload), retain=True)
-            # self.logger.debug(f"Published discovery for {topic}")
-        except Exception as e:
-            self.logger.error(f"Failed to publish discovery for {topic}: {e}")
+        self.discovery_payloads[key] = (topic, dumps(payload))
+        self.publish_discovery(*self.discovery_payloads[key])
 
 
     def publish_warn_state(self, value, entity_id):
-        main_topic = 'sensor'
-        topic = f"{main_topic}/{self.device_name}_{entity_id}/state"
+        topic = self.state_topic('sensor', entity_id)
         # self.logger.debug(f"Publishing data to topic: {topic}")
 
-        payload = {
-            "state": value,
-        }
+        if type(value) is str:
+            payload = WARN_STATE_TEMPLATE % encode_basestring_ascii(value)
+        else:
+            payload = dumps({"state": value})
 
-        # self.logger.debug(f"Data payload: {json.dumps(payload)}")
-        try:
-            self.mqtt_client.publish(topic, json.dumps(payload))
-            # self.logger.debug(f"Published data for {topic}")
-        except Exception as e:
-            self.logger.error(f"Failed to publish data for {topic}: {e}")
+        # self.logger.debug(f"Data payload: {payload}")
+        self.mqtt_client.publish(topic, payload)
 
@@ -1,25 +1,97 @@
 import requests
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 class HA_REST_API:
 
     def __init__(self,long_lived_access_token):
         self.long_lived_access_token = long_lived_access_token
-
-    def publish_data(self, value, unit, entity_id):
-
-        base_url = "http://homeassistant.local:8123/api/states/"
-        headers = {
+        self.base_url = "http://homeassistant.local:8123/api/states/"
+        self.headers = {
             "Authorization": f"Bearer {self.long_lived_access_token}",
             "content-type": "application/json",
         }
+        # requests.Session is not documented as thread-safe, so every worker keeps its own keep-alive session
+        self.local = threading.local()
+        self.sessions = []
+        # Latest (value, unit) per entity that still has to be posted, and the entities a worker is responsible for.
+        # An entity is handled by at most one worker at a time, so its posts stay in order and the backlog never
+        # grows beyond one pending value per entity while Home Assistant is slow or unreachable
+        self.pending = {}
+        self.scheduled = set()
+        self.closed = False
+        self.lock = threading.Lock()
+        # Posts run in the background so the BMS poll loop never waits on Home Assistant
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ha_rest_api")
+        self.logger = logging.getLogger(__name__)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.pending.clear()
+        # Wait for posts already in flight, they may still be using their session
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        with self.lock:
+            # Entities whose queued job was cancelled
+            self.scheduled.clear()
+            sessions = self.sessions
+            self.sessions = []
+        for session in sessions:
+            session.close()
+
+    def get_session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            session.headers.update(self.headers)
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
+    def publish_data(self, value, unit, entity_id):
+        with self.lock:
+            if self.closed:
+                return
+            # A value still waiting to be posted is simply replaced by the newer one
+            self.pending[entity_id] = (value, unit)
+            if entity_id in self.scheduled:
+                return
+            self.scheduled.add(entity_id)
+        try:
+            self.executor.submit(self.post_pending, entity_id)
+        except RuntimeError:
+            # close() shut the executor down in between
+            with self.lock:
+                self.scheduled.discard(entity_id)
+                self.pending.pop(entity_id, None)
+
+    def post_pending(self, entity_id):
+        while True:
+            with self.lock:
+                item = self.pending.pop(entity_id, None)
+                if item is None:
+                    self.scheduled.discard(entity_id)
+                    return
+            value, unit = item
+            try:
+                self.post_state(value, unit, entity_id)
+            except Exception as e:
+                self.logger.error("Error sending data for %s: %s", entity_id, e)
+
+    def post_state(self, value, unit, entity_id):
 
         data = {
             "state": value,
             "attributes": {"unit_of_measurement": unit}
         }
 
-        url = base_url + entity_id
-        response = requests.post(url, headers=headers, json=data)
+        url = self.base_url + entity_id
+        try:
+            response = self.get_session().post(url, json=data, timeout=5)
+        except requests.RequestException as e:
+            self.logger.error("Error sending data for %s: %s", entity_id, e)
+            return
 
         if response.status_code != 200:
-            print(f"Error sending data for {entity_id}: {response.text}")
\ No newline at end of file
+            self.logger.error("Error sending data for %s: %s", entity_id, response.text)
@@ -1,5 +1,148 @@
 import struct
 import logging
+import random
+
+# Meaning of every possible warning byte, so interpret_warning is a single lookup
+WARNING_STATES = ['unknown'] * 256
+WARNING_STATES[0x00] = 'normal'
+WARNING_STATES[0x01] = 'below lower limit'
+WARNING_STATES[0x02] = 'above upper limit'
+WARNING_STATES[0x80:0xF0] = ['user defined'] * (0xF0 - 0x80)
+WARNING_STATES[0xF0] = 'other fault'
+WARNING_STATES = tuple(WARNING_STATES)
+
+# Fixed fields following the temperatures: current, total voltage, remain capacity, P, full capacity, cycles, design capacity
+PACK_TAIL = struct.Struct('>hHHBHHH')
+
+# Compiled layouts of the big-endian 16-bit blocks (cell voltages, temperatures), keyed by word count
+WORD_BLOCKS = {}
+
+def word_block(count):
+    block = WORD_BLOCKS.get(count)
+    if block is None:
+        block = WORD_BLOCKS[count] = struct.Struct(f'>{count}H')
+    return block
+
+# Warning fields published as a group of binary sensors, with the icon used for the whole group
+WARN_BINARY_ICONS = {
+    'protect_state_1': 'mdi:battery-alert',
+    'protect_state_2': 'mdi:battery-alert',
+    'instruction_state': 'mdi:battery-check',
+    'fault_state': 'mdi:alert',
+    'warn_state_1': 'mdi:battery-heart-variant',
+    'warn_state_2': 'mdi:battery-heart-variant',
+}
+
+# Warning fields that are not published
+WARN_SKIPPED_KEYS = frozenset(('cell_number', 'temp_sensor_number', 'control_state', 'balance_state_1', 'balance_state_2'))
+
+# Unit, icon and Home Assistant classes per analog entity, shared by every publish cycle
+ANALOG_UNITS = {
+    'view_num_cells': 'cells',
+    'cell_voltages': 'mV',
+    'view_num_temps': 'NTCs',
+    'temperatures': '℃',
+    'view_current': 'A',
+    'view_voltage': 'V',
+    'view_remain_capacity': 'Ah',
+    'view_full_capacity': 'Ah',
+    'view_cycle_number': 'cycles',
+    'view_design_capacity': 'Ah',
+    'view_power': 'kW',
+    'view_energy_charged': 'Wh',
+    'view_energy_discharged': 'Wh',
+    'view_SOH': '%',
+    'view_SOC': '%',
+}
+
+ANALOG_ICONS = {
+    'total_packs_num': 'mdi:database',
+    'total_full_capacity': 'mdi:battery-high',
+    'total_remain_capacity': 'mdi:battery-clock',
+    'total_current': 'mdi:current-dc',
+    'total_SOC': 'mdi:battery-70',
+    'total_voltage': 'mdi:sine-wave',
+    'total_power': 'mdi:battery-charging',
+    'total_SOH': 'mdi:battery-plus-variant',
+    'total_energy_charged': 'mdi:battery-positive',
+    'total_energy_discharged': 'mdi:battery-negative',
+    'view_num_cells': 'mdi:database',
+    'cell_voltages': 'mdi:sine-wave',
+    'view_num_temps': 'mdi:database',
+    'temperatures': 'mdi:thermometer',
+    'view_current': 'mdi:current-dc',
+    'view_voltage': 'mdi:sine-wave',
+    'view_remain_capacity': 'mdi:battery-clock',
+    'view_full_capacity': 'mdi:battery-high',
+    'view_cycle_number': 'mdi:battery-sync',
+    'view_design_capacity': 'mdi:battery-high',
+    'view_power': 'mdi:battery-charging',
+    'view_energy_charged': 'mdi:battery-positive',
+    'view_energy_discharged': 'mdi:battery-negative',
+    'view_SOH': 'mdi:battery-plus-variant',
+    'view_SOC': 'mdi:battery-70',
+    'random_number': 'mdi:battery-70',
+}
+
+ANALOG_DEVICECLASSES = {
+    'total_packs_num': 'null',
+    'total_full_capacity': 'null',
+    'total_remain_capacity': 'null',
+    'total_current': 'current',
+    'total_SOC': 'battery',
+    'total_voltage': 'voltage',
+    'total_power': 'power',
+    'total_SOH': 'null',
+    'total_energy_charged': 'energy',
+    'total_energy_discharged': 'energy',
+    'cell_voltages': 'voltage',
+    'temperatures': 'temperature',
+    'view_num_cells': 'null',
+    'view_num_temps': 'null',
+    'view_current': 'current',
+    'view_voltage': 'voltage',
+    'view_remain_capacity': 'null',
+    'view_full_capacity': 'null',
+    'view_cycle_number': 'null',
+    'view_design_capacity': 'null',
+    'view_energy_charged': 'energy',
+    'view_energy_discharged': 'energy',
+    'view_power': 'power',
+    'view_energy_charged': 'energy',
+    'view_energy_discharged': 'energy',
+    'view_SOH': 'null',
+    'view_SOC': 'null',
+    'random_number': 'null',
+}
+
+ANALOG_STATECLASSES = {
+    'total_packs_num': 'measurement',
+    'total_full_capacity': 'measurement',
+    'total_remain_capacity': 'measurement',
+    'total_current': 'measurement',
+    'total_SOC': 'measurement',
+    'total_voltage': 'measurement',
+    'total_power': 'measurement',
+    'total_SOH': 'measurement',
+    'total_energy_charged': 'total',
+    'total_energy_discharged': 'total',
+    'view_num_cells': 'measurement',
+    'cell_voltages': 'measurement',
+    'view_num_temps': 'measurement',
+    'temperatures': 'measurement',
+    'view_current': 'measurement',
+    'view_voltage': 'measurement',
+    'view_remain_capacity': 'measurement',
+    'view_full_capacity': 'measurement',
+    'view_cycle_number': 'measurement',
+    'view_design_capacity': 'measurement',
+    'view_power': 'measurement',
+    'view_energy_charged': 'total',
+    'view_energy_discharged': 'total',
+    'view_SOH': 'measurement',
+    'view_SOC': 'measurement',
+    'random_number': 'measurement',
+}
 
 class PACEBMS485:
 
@@ -9,17 +152,16 @@ class PACEBMS485:
         self.data_refresh_interval = data_refresh_interval
         self.if_random = if_random
 
-        # Configure logging
-        logging.basicConfig(level=logging.DEBUG if debug else logging.INFO,
-                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        # Request frames only depend on (command, pack_number), so build each one once
+        self.request_cache = {}
+
         self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
 
     def lchksum_calc(self, lenid):
         try:
-            chksum = sum(int(chr(lenid[element]), 16) for element in range(len(lenid))) % 16
-            chksum_bin = '{0:04b}'.format(chksum)
-            flip_bits = ''.join('1' if b == '0' else '0' for b in chksum_bin)
-            chksum = (int(flip_bits, 2) + 1) % 16
+            # Two's complement of the LENID digit sum, modulo 16
+            chksum = -sum(int(chr(digit), 16) for digit in lenid) % 16
             return format(chksum, 'X')
         except Exception as e:
             self.logger.error(f"Error calculating LCHKSUM using LENID: {lenid}")
@@ -28,38 +170,21 @@ class PACEBMS485:
     
     def chksum_calc(self, data):
         try:
-            chksum = sum(data[element] for element in range(1, len(data))) % 65536
-            chksum_bin = '{0:016b}'.format(chksum)
-            flip_bits = ''.join('1' if b == '0' else '0' for b in chksum_bin)
-            chksum = format(int(flip_bits, 2) + 1, 'X')
+            # Invert the 16-bit sum of everything after SOI and add one, summed in C over a memoryview
+            chksum = sum(memoryview(data)[1:]) % 65536
+            chksum = format((~chksum & 0xFFFF) + 1, 'X')
             return chksum
         except Exception as e:
             self.logger.error(f"Error calculating CHKSUM using data: {data}")
             self.logger.error(f"Error details: {str(e)}")
             return False
     
-    def hex_to_signed(self, hex_str):
-        """
-        Convert a 16-bit hexadecimal string to signed integer value.
-        
-        :param hex_str: Hexadecimal string representing battery current (e.g., "FFFB")
-        :return: Signed integer current value
-        """
-        # Convert the hexadecimal string to an integer
-        raw_value = int(hex_str, 16)
-        
-        # Process the 16-bit two's complement signed integer
-        if raw_value & 0x8000:  # Check the sign bit (if the highest bit is 1)
-            # Handle negative numbers: invert bits and add 1, then attach negative sign
-            signed_value = -((~raw_value & 0xFFFF) + 1)
-        else:
-            signed_value = raw_value
-        
-        
-        return signed_value
-
 
     def generate_bms_request(self, command, pack_number=None):
+        cache_key = (command, pack_number)
+        if cache_key in self.request_cache:
+            return self.request_cache[cache_key]
+
         commands_table = {
             'pack_number': b"\x39\x30",
             'analog': b"\x34\x32",
@@ -112,6 +237,8 @@ class PACEBMS485:
             return None
     
         request += CHKSUM.encode('ascii') + b'\x0d'
+
+        self.request_cache[cache_key] = request
     
         return request
     
@@ -119,7 +246,7 @@ class PACEBMS485:
     
     
     
-    def generate_mosfet_control_request(self, command_type, state):
+    def generate_mosfet_control_request(self, command_type, state, pack_number=None):
         """
         Generates a request to send to the BMS to control MOSFET states.
         
@@ -129,19 +256,16 @@ class PACEBMS485:
                             - 'charge' for controlling charge MOSFET.
                             - 'discharge' for controlling discharge MOSFET.
         state (int): The state to set for the MOSFET (0 to open, 1 to close).
+        pack_number (int): Address of the pack, defaults to 255 like generate_bms_request.
         
         Returns:
         bytes: The request message to be sent to the BMS.
         """
         
-        SOI = 0x7E
-        VER = 0x32
-        ADR = 0x35
-        EOI = 0x0D
-        
+        # CID2 and LENID per command, INFO is the requested state as one hex byte
         commands = {
-            'charge': (0x46, 0x9A, 0x02),
-            'discharge': (0x46, 0x9B, 0x02)
+            'charge': (b"\x39\x41", b"002"),
+            'discharge': (b"\x39\x42", b"002")
         }
         
         if command_type not in commands:
@@ -150,14 +274,24 @@ class PACEBMS485:
         if state not in [0, 1]:
             raise ValueError("Invalid state. Must be 0 (open) or 1 (close)")
         
-        CID1, CID2, length = commands[command_type]
-        data_info = struct.pack('B', state)
-        
-        len_id = struct.pack('B', length)
-        data = struct.pack('BBBBBB', SOI, VER, ADR, CID1, CID2, length) + data_info + struct.pack('BB', EOI)
-        chk_sum = calculate_checksum(data)
-        
-        request = data[:-1] + struct.pack('B', chk_sum) + data[-1:]
+        cid2, LENID = commands[command_type]
+
+        pack_number = pack_number if pack_number is not None else 255
+
+        # Same ASCII-hex framing and LCHKSUM/CHKSUM as generate_bms_request
+        request = b'\x7e' + b"\x32\x35" + f"{pack_number:02X}".encode('ascii') + b"\x34\x36" + cid2
+
+        LCHKSUM = self.lchksum_calc(LENID)
+        if LCHKSUM is False:
+            return None
+
+        request += LCHKSUM.encode('ascii') + LENID + f"{state:02X}".encode('ascii')
+
+        CHKSUM = self.chksum_calc(request)
+        if CHKSUM is False:
+            return None
+
+        request += CHKSUM.encode('ascii') + b'\x0d'
         return request
     
     
@@ -182,72 +316,69 @@ class PACEBMS485:
         if response[0] == '~':
             response = response[1:]
     
-        # Split the response into fields (assuming each field is 2 characters representing a byte)
-        fields = [response[i:i + 2] for i in range(0, len(response), 2)]
+        # Decode the whole ASCII hex response in one pass (each pair of characters is one byte)
+        frame = bytes.fromhex(response)
     
-        # Debug: Print the fields to verify their contents
-        self.logger.debug(f"fields: {fields}")
+        # Debug: Print the frame to verify its contents
+        self.logger.debug("frame: %s", response)
         # Check the command and response validity
-        if fields[2] != '46' or fields[3] != '00':
-            raise ValueError(f"Invalid command or response code: {fields[2]} {fields[3]}")
+        if frame[2] != 0x46 or frame[3] != 0x00:
+            raise ValueError(f"Invalid command or response code: {frame[2]:02X} {frame[3]:02X}")
             return None
     
         # Extract the length of the data information
-        length = int(fields[4] + fields[5], 16)
+        length = int.from_bytes(frame[4:6], 'big')
+
+        # Reject truncated frames before any field is decoded, LENID (low 12 bits) counts INFO characters
+        info_length = (length & 0x0FFF) // 2
+        if len(frame) < 6 + info_length:
+            self.logger.error(f"Truncated response: expected {info_length} INFO bytes, got {len(frame) - 6}")
+            return None
     
         # Start parsing the data information
         offset = 6  # Start after fixed header fields
     
         # INFOFLAG
-        infoflag = int(fields[offset], 16)
+        infoflag = frame[offset]
         offset += 1
     
         # Number of packs
-        num_packs = int(fields[offset], 16)
+        num_packs = frame[offset]
         offset += 1
     
         # for pack_index in range(num_packs):
         pack_data = {}
 
         # Number of cells
-        num_cells = int(fields[offset], 16)
+        num_cells = frame[offset]
         offset += 1
         pack_data['view_num_cells'] = num_cells
 
-        # Cell voltages
-        cell_voltages = []
-        for cell_index in range(num_cells):
-            voltage = int(fields[offset] + fields[offset + 1], 16)  # Combine two bytes for voltage
-            cell_voltages.append(voltage)
-            offset += 2
+        # Cell voltages, decode the whole block of 16-bit values in one go
+        cell_voltages = list(word_block(num_cells).unpack_from(frame, offset))
+        offset += num_cells * 2
         pack_data['cell_voltages'] = cell_voltages
 
         # Number of temperature sensors
-        num_temps = int(fields[offset], 16)
+        num_temps = frame[offset]
         offset += 1
         pack_data['view_num_temps'] = num_temps
 
-        # Temperatures
-        temperatures = []
-        for temp_index in range(num_temps):
-            temperature = int(fields[offset] + fields[offset + 1], 16)  # Combine two bytes for temperature
-            temperature = round(temperature / 10 - 273.15, 2)  # Convert tenths of degrees Kelvin to degrees Celsius
-            temperatures.append(temperature)
-            offset += 2
+        # Temperatures, decode the whole block and convert tenths of degrees Kelvin to degrees Celsius
+        temperatures = [round(temperature / 10 - 273.15, 2) for temperature in word_block(num_temps).unpack_from(frame, offset)]
+        offset += num_temps * 2
         pack_data['temperatures'] = temperatures
 
-        # Pack current
-        pack_current = fields[offset] + fields[offset + 1]  # Combine two bytes for current
-        pack_current = self.hex_to_signed(pack_current) / 100
-
-        offset += 2
+        # Current, total voltage, capacities, P and cycle number are fixed-width, unpack them in one call
+        (pack_current, pack_total_voltage, pack_remain_capacity, define_number_p,
+         pack_full_capacity, cycle_number, pack_design_capacity) = PACK_TAIL.unpack_from(frame, offset)
+        offset += PACK_TAIL.size
+        pack_current = pack_current / 100
         
         pack_data['view_current'] = pack_current
 
         # Pack total voltage
-        pack_total_voltage = int(fields[offset] + fields[offset + 1], 16)  # Combine two bytes for total voltage
         pack_total_voltage = round(pack_total_voltage / 1000, 2)  # Convert mV to V
-        offset += 2
         pack_data['view_voltage'] = pack_total_voltage
 
         pack_power = round(pack_total_voltage * pack_current / 1000, 4) # Convert W to kW
@@ -257,32 +388,20 @@ class PACEBMS485:
         pack_data['view_energy_discharged'] = abs(pack_power) * self.data_refresh_interval / 3600 * 1000 if pack_power < 0 else 0
 
         # Pack remain capacity
-        pack_remain_capacity = int(fields[offset] + fields[offset + 1], 16)  # Combine two bytes for remaining capacity
         pack_remain_capacity = round(pack_remain_capacity / 100, 2)  # Convert 10mAH to AH
-        offset += 2
         pack_data['view_remain_capacity'] = pack_remain_capacity
 
-        # Define number P
-        define_number_p = int(fields[offset], 16)
-        offset += 1
-
         # Pack full capacity
-        pack_full_capacity = int(fields[offset] + fields[offset + 1], 16)  # Combine two bytes for full capacity
         pack_full_capacity = round(pack_full_capacity / 100, 2)  # Convert 10mAH to AH
-        offset += 2
         pack_data['view_full_capacity'] = pack_full_capacity
 
         pack_data['view_SOC'] = round(pack_remain_capacity / pack_full_capacity * 100, 1)
 
         # Cycle number
-        cycle_number = int(fields[offset] + fields[offset + 1], 16)  # Combine two bytes for cycle number
-        offset += 2
         pack_data['view_cycle_number'] = cycle_number
 
         # Pack design capacity
-        pack_design_capacity = int(fields[offset] + fields[offset + 1], 16)  # Combine two bytes for design capacity
         pack_design_capacity = round(pack_design_capacity / 100, 2)  # Convert 10mAH to AH
-        offset += 2
         pack_data['view_design_capacity'] = pack_design_capacity
 
         pack_data['view_SOH'] = round(pack_full_capacity / pack_design_capacity * 100, 0)
@@ -333,28 +452,16 @@ class PACEBMS485:
     
     # Interpret function for warnings
     def interpret_warning(self, value):
-        if value == 0x00:
-            return 'normal'
-        elif value == 0x01:
-            return 'below lower limit'
-        elif value == 0x02:
-            return 'above upper limit'
-        elif 0x80 <= value <= 0xEF:
-            return 'user defined'
-        elif value == 0xF0:
-            return 'other fault'
-        else:
-            return 'unknown'
+        return WARNING_STATES[value]
     
     def parse_warnstate(self, warnstate):
         if warnstate == None:
             return None
-        warnstate_bytes = bytes.fromhex(warnstate)
-        index = 0
+        # Fields are consumed strictly in order, so walk the bytes with an iterator
+        next_byte = iter(bytes.fromhex(warnstate)).__next__
     
         # Get PACKnumber
-        pack_number = warnstate_bytes[index]
-        index += 1
+        pack_number = next_byte()
     
         packs_info = []
     
@@ -362,45 +469,38 @@ class PACEBMS485:
         pack_info = {}
 
         # Parse 1. Cell number
-        cell_number = warnstate_bytes[index]
+        cell_number = next_byte()
         pack_info['cell_number'] = cell_number
-        index += 1
 
         # Parse 2. Cell voltage warnings
         cell_voltage_warnings = []
         for _ in range(cell_number):
-            cell_voltage_warn = warnstate_bytes[index]
+            cell_voltage_warn = next_byte()
             cell_voltage_warnings.append(self.interpret_warning(cell_voltage_warn))
-            index += 1
         pack_info['cell_voltage_warnings'] = cell_voltage_warnings
 
         # Parse 3. Temperature sensor number
-        temp_sensor_number = warnstate_bytes[index]
+        temp_sensor_number = next_byte()
         pack_info['temp_sensor_number'] = temp_sensor_number
-        index += 1
 
         # Parse 4. Temperature sensor warnings
         temp_sensor_warnings = []
         for _ in range(temp_sensor_number):
-            temp_sensor_warn = warnstate_bytes[index]
+            temp_sensor_warn = next_byte()
             temp_sensor_warnings.append(self.interpret_warning(temp_sensor_warn))
-            index += 1
         pack_info['temp_sensor_warnings'] = temp_sensor_warnings
 
         # Parse 5. PACK charge current warning
-        pack_info['warn_charge_current'] = self.interpret_warning(warnstate_bytes[index])
-        index += 1
+        pack_info['warn_charge_current'] = self.interpret_warning(next_byte())
 
         # Parse 6. PACK total voltage warning
-        pack_info['warn_total_voltage'] = self.interpret_warning(warnstate_bytes[index])
-        index += 1
+        pack_info['warn_total_voltage'] = self.interpret_warning(next_byte())
 
         # Parse 7. PACK discharge current warning
-        pack_info['warn_discharge_current'] = self.interpret_warning(warnstate_bytes[index])
-        index += 1
+        pack_info['warn_discharge_current'] = self.interpret_warning(next_byte())
 
         # Detailed interpretation for Protect State 1 based on Char A.19
-        protect_state_1 = warnstate_bytes[index]
+        protect_state_1 = next_byte()
         pack_info['protect_state_1'] = {
             'protect_short_circuit': bool(protect_state_1 & 0b01000000),
             'protect_high_discharge_current': bool(protect_state_1 & 0b00100000),
@@ -410,10 +510,9 @@ class PACEBMS485:
             'protect_low_cell_voltage': bool(protect_state_1 & 0b00000010),
             'protect_high_cell_voltage': bool(protect_state_1 & 0b00000001),
         }
-        index += 1
 
         # Detailed interpretation for Protect State 2 based on Char A.20
-        protect_state_2 = warnstate_bytes[index]
+        protect_state_2 = next_byte()
         pack_info['protect_state_2'] = {
             'status_fully_charged': bool(protect_state_2 & 0b10000000),
             'protect_low_env_temp': bool(protect_state_2 & 0b01000000),
@@ -424,9 +523,8 @@ class PACEBMS485:
             'protect_high_discharge_temp': bool(protect_state_2 & 0b00000010),
             'protect_high_charge_temp': bool(protect_state_2 & 0b00000001),
         }
-        index += 1
 
-        instruction_state = warnstate_bytes[index]
+        instruction_state = next_byte()
         pack_info['instruction_state'] = {
             'status_charger_avaliable': bool(instruction_state & 0b00100000),
             'status_reverse_connected': bool(instruction_state & 0b00010000),
@@ -434,18 +532,16 @@ class PACEBMS485:
             'status_charge_enabled': bool(instruction_state & 0b00000010),
             'status_current_limit_enabled': bool(instruction_state & 0b00000001),
         }
-        index += 1
         
-        control_state = warnstate_bytes[index]
+        control_state = next_byte()
         pack_info['control_state'] = {
             'led_warn_function': bool(control_state & 0b00100000),
             'current_limit_function': bool(control_state & 0b00010000),
             'current_limit_gear': bool(control_state & 0b00001000),
             'buzzer_warn_function': bool(control_state & 0b00000001),
         }
-        index += 1
         
-        fault_state = warnstate_bytes[index]
+        fault_state = next_byte()
         pack_info['fault_state'] = {
             'fault_sampling': bool(fault_state & 0b00100000),
             'fault_cell': bool(fault_state & 0b00010000),
@@ -453,17 +549,14 @@ class PACEBMS485:
             'fault_discharge_MOS': bool(fault_state & 0b00000010),
             'fault_charge_MOS': bool(fault_state & 0b00000001),
         }
-        index += 1
         
-        pack_info['balance_state_1'] = warnstate_bytes[index]
-        index += 1
+        pack_info['balance_state_1'] = next_byte()
         
-        pack_info['balance_state_2'] = warnstate_bytes[index]
-        index += 1
+        pack_info['balance_state_2'] = next_byte()
 
 
         # Detailed interpretation for Warn State 1 based on Char A.24
-        warn_state_1 = warnstate_bytes[index]
+        warn_state_1 = next_byte()
         pack_info['warn_state_1'] = {
             'warn_high_discharge_current': bool(warn_state_1 & 0b00100000),
             'warn_high_charge_current': bool(warn_state_1 & 0b00010000),
@@ -472,10 +565,9 @@ class PACEBMS485:
             'warn_low_cell_voltage': bool(warn_state_1 & 0b00000010),
             'warn_high_cell_voltage': bool(warn_state_1 & 0b00000001),
         }
-        index += 1
 
         # Detailed interpretation for Warn State 2 based on Char A.25
-        warn_state_2 = warnstate_bytes[index]
+        warn_state_2 = next_byte()
         pack_info['warn_state_2'] = {
             'warn_low_SOC': bool(warn_state_2 & 0b10000000),
             'warn_high_MOS_temp': bool(warn_state_2 & 0b01000000),
@@ -486,7 +578,6 @@ class PACEBMS485:
             'warn_high_discharge_temp': bool(warn_state_2 & 0b00000010),
             'warn_high_charge_temp': bool(warn_state_2 & 0b00000001),
         }
-        index += 1
 
         # packs_info.append(pack_info)
     
@@ -664,27 +755,27 @@ class PACEBMS485:
         
         try:
             # Generate request
-            self.logger.debug(f"Trying to prepare analog request")
+            self.logger.debug("Trying to prepare analog request")
             request = self.generate_bms_request("analog",pack_number)
-            self.logger.debug(f"analog request: {request}")
+            self.logger.debug("analog request: %s", request)
 
             # Send request to BMS
-            self.logger.debug(f"Trying to send analog request")
+            self.logger.debug("Trying to send analog request")
             if not self.bms_comm.send_data(request):
                 return None
-            self.logger.debug(f"analog request sent")
+            self.logger.debug("analog request sent")
     
             # Receive response from BMS
-            self.logger.debug(f"Trying to receive analog data")
+            self.logger.debug("Trying to receive analog data")
             response = self.bms_comm.receive_data()
-            self.logger.debug(f"analog data recieved: {response}")
+            self.logger.debug("analog data recieved: %s", response)
             if response is None:
                 return None
             
             # Parse analog data from response
-            self.logger.debug(f"Trying to parse analog data")
+            self.logger.debug("Trying to parse analog data")
             analog_data = self.parse_analog_data(response)
-            self.logger.debug(f"analog data parsed: {analog_data}")
+            self.logger.debug("analog data parsed: %s", analog_data)
             return analog_data
     
         except Exception as e:
@@ -697,27 +788,27 @@ class PACEBMS485:
         
         try:
             # Generate request
-            self.logger.debug(f"Trying to prepare warning request")
+            self.logger.debug("Trying to prepare warning request")
             request = self.generate_bms_request("warning_info",pack_number)
-            self.logger.debug(f"warning request: {request}")
+            self.logger.debug("warning request: %s", request)
             
             # Send request to BMS
-            self.logger.debug(f"Trying to send warning request")
+            self.logger.debug("Trying to send warning request")
             if not self.bms_comm.send_data(request):
                 return None
-            self.logger.debug(f"warning request sent")
+            self.logger.debug("warning request sent")
             
             # Receive response from BMS
-            self.logger.debug(f"Trying to receive warning data")
+            self.logger.debug("Trying to receive warning data")
             response = self.bms_comm.receive_data()
-            self.logger.debug(f"warning data recieved: {response}")
+            self.logger.debug("warning data recieved: %s", response)
             if response is None:
                 return None
             
             # Parse analog data from response
-            self.logger.debug(f"Trying to parse warning data")
+            self.logger.debug("Trying to parse warning data")
             warning_data = self.parse_warning_data(response)
-            self.logger.debug(f"warning data parsed: {warning_data}")
+            self.logger.debug("warning data parsed: %s", warning_data)
     
             return warning_data
     
@@ -731,27 +822,27 @@ class PACEBMS485:
         
         try:
             # Generate request
-            self.logger.debug(f"Trying to prepare capacity request")
+            self.logger.debug("Trying to prepare capacity request")
             request = self.generate_bms_request("capacity",pack_number)
-            self.logger.debug(f"capacity request: {request}")
+            self.logger.debug("capacity request: %s", request)
 
             # Send request to BMS
-            self.logger.debug(f"Trying to send capacity request")
+            self.logger.debug("Trying to send capacity request")
             if not self.bms_comm.send_data(request):
                 return None
-            self.logger.debug(f"capacity request sent")
+            self.logger.debug("capacity request sent")
     
             # Receive response from BMS
-            self.logger.debug(f"Trying to receive capacity data")
+            self.logger.debug("Trying to receive capacity data")
             response = self.bms_comm.receive_data()
-            self.logger.debug(f"capacity data recieved: {response}")
+            self.logger.debug("capacity data recieved: %s", response)
             if response is None:
                 return None
             
             # Parse analog data from response
-            self.logger.debug(f"Trying to parse capacity data")
+            self.logger.debug("Trying to parse capacity data")
             capacity_data = self.parse_capacity_data(response)
-            self.logger.debug(f"capacity data parsed: {capacity_data}")
+            self.logger.debug("capacity data parsed: %s", capacity_data)
             return capacity_data
     
         except Exception as e:
@@ -764,28 +855,28 @@ class PACEBMS485:
         
         try:
             # Generate request
-            self.logger.debug(f"Trying to prepare product info request")
+            self.logger.debug("Trying to prepare product info request")
             request = self.generate_bms_request("product_info",pack_number)
-            self.logger.debug(f"product info request: {request}")
+            self.logger.debug("product info request: %s", request)
 
             # Send request to BMS
-            self.logger.debug(f"Trying to send product info request")
+            self.logger.debug("Trying to send product info request")
             if not self.bms_comm.send_data(request):
                 return None
-            self.logger.debug(f"product info request sent")
+            self.logger.debug("product info request sent")
     
             # Receive response from BMS
-            self.logger.debug(f"Trying to receive product info data")
+            self.logger.debug("Trying to receive product info data")
             response = self.bms_comm.receive_data()
-            self.logger.debug(f"product info data recieved: {response}")
+            self.logger.debug("product info data recieved: %s", response)
             if response is None:
                 return None
             
             # Parse analog data from response
-            self.logger.debug(f"Trying to parse product info data")
+            self.logger.debug("Trying to parse product info data")
             bms_info, pack_info =  self.parse_product_info_data(response)
-            self.logger.debug(f"product info data parsed: {bms_info}")
-            self.logger.debug(f"product info data parsed: {pack_info}")
+            self.logger.debug("product info data parsed: %s", bms_info)
+            self.logger.debug("product info data parsed: %s", pack_info)
             return bms_info, pack_info
     
         except Exception as e:
@@ -797,27 +888,27 @@ class PACEBMS485:
         
         try:
             # Generate request
-            self.logger.debug(f"Trying to prepare pack num request")
+            self.logger.debug("Trying to prepare pack num request")
             request = self.generate_bms_request("pack_number",pack_number)
-            self.logger.debug(f"pack num request: {request}")
+            self.logger.debug("pack num request: %s", request)
 
             # Send request to BMS
-            self.logger.debug(f"Trying to send pack num request")
+            self.logger.debug("Trying to send pack num request")
             if not self.bms_comm.send_data(request):
                 return None
-            self.logger.debug(f"pack num request sent")
+            self.logger.debug("pack num request sent")
     
             # Receive response from BMS
-            self.logger.debug(f"Trying to receive pack num data")
+            self.logger.debug("Trying to receive pack num data")
             response = self.bms_comm.receive_data()
-            self.logger.debug(f"pack num data recieved: {response}")
+            self.logger.debug("pack num data recieved: %s", response)
             if response is None:
                 return None
             
             # Parse analog data from response
-            self.logger.debug(f"Trying to parse pack num data")
+            self.logger.debug("Trying to parse pack num data")
             pack_number_data = self.parse_pack_number_data(response)
-            self.logger.debug(f"pack num data parsed: {pack_number_data}")
+            self.logger.debug("pack num data parsed: %s", pack_number_data)
             return pack_number_data
     
         except Exception as e:
@@ -874,7 +965,6 @@ class PACEBMS485:
         total_power = round(sum(d.get('pack_full_capacity', 0) for d in analog_data),2)
         self.ha_comm.publish_data(total_power, 'kW', f"{self.base_topic}.total_power")
 
-        import random
         random_number = random.randint(1, 100)
         self.ha_comm.publish_data(random_number, 'p', f"{self.base_topic}.random")
 
@@ -902,113 +992,6 @@ class PACEBMS485:
 
     def publish_analog_data_mqtt(self, pack_list):
 
-        units = {
-            'view_num_cells': 'cells',
-            'cell_voltages': 'mV',
-            'view_num_temps': 'NTCs',
-            'temperatures': '℃',
-            'view_current': 'A',
-            'view_voltage': 'V',
-            'view_remain_capacity': 'Ah',
-            'view_full_capacity': 'Ah',
-            'view_cycle_number': 'cycles',
-            'view_design_capacity': 'Ah',
-            'view_power': 'kW',
-            'view_energy_charged': 'Wh',
-            'view_energy_discharged': 'Wh',
-            'view_SOH': '%',
-            'view_SOC': '%',
-        }
-
-        icons = {
-            'total_packs_num': 'mdi:database',
-            'total_full_capacity': 'mdi:battery-high',
-            'total_remain_capacity': 'mdi:battery-clock',
-            'total_current': 'mdi:current-dc',
-            'total_SOC': 'mdi:battery-70',
-            'total_voltage': 'mdi:sine-wave',
-            'total_power': 'mdi:battery-charging',
-            'total_SOH': 'mdi:battery-plus-variant',
-            'total_energy_charged': 'mdi:battery-positive',
-            'total_energy_discharged': 'mdi:battery-negative',
-            'view_num_cells': 'mdi:database',
-            'cell_voltages': 'mdi:sine-wave',
-            'view_num_temps': 'mdi:database',
-            'temperatures': 'mdi:thermometer',
-            'view_current': 'mdi:current-dc',
-            'view_voltage': 'mdi:sine-wave',
-            'view_remain_capacity': 'mdi:battery-clock',
-            'view_full_capacity': 'mdi:battery-high',
-            'view_cycle_number': 'mdi:battery-sync',
-            'view_design_capacity': 'mdi:battery-high',
-            'view_power': 'mdi:battery-charging',
-            'view_energy_charged': 'mdi:battery-positive',
-            'view_energy_discharged': 'mdi:battery-negative',
-            'view_SOH': 'mdi:battery-plus-variant',
-            'view_SOC': 'mdi:battery-70',
-            'random_number': 'mdi:battery-70',
-        }
-
-        deviceclasses = {
-            'total_packs_num': 'null',
-            'total_full_capacity': 'null',
-            'total_remain_capacity': 'null',
-            'total_current': 'current',
-            'total_SOC': 'battery',
-            'total_voltage': 'voltage',
-            'total_power': 'power',
-            'total_SOH': 'null',
-            'total_energy_charged': 'energy',
-            'total_energy_discharged': 'energy',
-            'cell_voltages': 'voltage',
-            'temperatures': 'temperature',
-            'view_num_cells': 'null',
-            'view_num_temps': 'null',
-            'view_current': 'current',
-            'view_voltage': 'voltage',
-            'view_remain_capacity': 'null',
-            'view_full_capacity': 'null',
-            'view_cycle_number': 'null',
-            'view_design_capacity': 'null',
-            'view_energy_charged': 'energy',
-            'view_energy_discharged': 'energy',
-            'view_power': 'power',
-            'view_energy_charged': 'energy',
-            'view_energy_discharged': 'energy',
-            'view_SOH': 'null',
-            'view_SOC': 'null',
-            'random_number': 'null',
-        }
-
-        stateclasses = {
-            'total_packs_num': 'measurement',
-            'total_full_capacity': 'measurement',
-            'total_remain_capacity': 'measurement',
-            'total_current': 'measurement',
-            'total_SOC': 'measurement',
-            'total_voltage': 'measurement',
-            'total_power': 'measurement',
-            'total_SOH': 'measurement',
-            'total_energy_charged': 'total',
-            'total_energy_discharged': 'total',
-            'view_num_cells': 'measurement',
-            'cell_voltages': 'measurement',
-            'view_num_temps': 'measurement',
-            'temperatures': 'measurement',
-            'view_current': 'measurement',
-            'view_voltage': 'measurement',
-            'view_remain_capacity': 'measurement',
-            'view_full_capacity': 'measurement',
-            'view_cycle_number': 'measurement',
-            'view_design_capacity': 'measurement',
-            'view_power': 'measurement',
-            'view_energy_charged': 'total',
-            'view_energy_discharged': 'total',
-            'view_SOH': 'measurement',
-            'view_SOC': 'measurement',
-            'random_number': 'measurement',
-        }
-
         analog_data = []
         for pack_number in pack_list:
             retry_count = 0
@@ -1018,7 +1001,7 @@ class PACEBMS485:
                 if analog_data_single is not None:
                     break  # got a valid value, break the loop
                 retry_count += 1
-                self.logger.debug(f"retry {retry_count} to get analog data of pack: {pack_number}")
+                self.logger.debug("retry %s to get analog data of pack: %s", retry_count, pack_number)
 
             if retry_count == max_retries:
                 self.logger.error(f"Failed to get analog data of pack: {pack_number} after {max_retries} retries")
@@ -1034,78 +1017,82 @@ class PACEBMS485:
 
 
         self.ha_comm.publish_sensor_state(total_packs_num, 'packs', "total_packs_num")
-        self.ha_comm.publish_sensor_discovery("total_packs_num", "packs", icons['total_packs_num'], deviceclasses['total_packs_num'], stateclasses['total_packs_num'])
+        self.ha_comm.publish_sensor_discovery("total_packs_num", "packs", ANALOG_ICONS['total_packs_num'], ANALOG_DEVICECLASSES['total_packs_num'], ANALOG_STATECLASSES['total_packs_num'])
 
         total_full_capacity = round(sum(d.get('view_full_capacity', 0) for d in analog_data),2)
         self.ha_comm.publish_sensor_state(total_full_capacity, 'Ah', "total_full_capacity")
-        self.ha_comm.publish_sensor_discovery("total_full_capacity", "Ah", icons['total_full_capacity'], deviceclasses['total_full_capacity'], stateclasses['total_full_capacity'])
+        self.ha_comm.publish_sensor_discovery("total_full_capacity", "Ah", ANALOG_ICONS['total_full_capacity'], ANALOG_DEVICECLASSES['total_full_capacity'], ANALOG_STATECLASSES['total_full_capacity'])
 
         total_remain_capacity = round(sum(d.get('view_remain_capacity', 0) for d in analog_data),2)
         self.ha_comm.publish_sensor_state(total_remain_capacity, 'Ah', "total_remain_capacity")
-        self.ha_comm.publish_sensor_discovery("total_remain_capacity", "Ah", icons['total_remain_capacity'], deviceclasses['total_remain_capacity'], stateclasses['total_remain_capacity'])
+        self.ha_comm.publish_sensor_discovery("total_remain_capacity", "Ah", ANALOG_ICONS['total_remain_capacity'], ANALOG_DEVICECLASSES['total_remain_capacity'], ANALOG_STATECLASSES['total_remain_capacity'])
 
         total_current = round(sum(d.get('view_current', 0) for d in analog_data),2)
         self.ha_comm.publish_sensor_state(total_current, 'A', "total_current")
-        self.ha_comm.publish_sensor_discovery("total_current", "A", icons['total_current'], deviceclasses['total_current'], stateclasses['total_current'])
+        self.ha_comm.publish_sensor_discovery("total_current", "A", ANALOG_ICONS['total_current'], ANALOG_DEVICECLASSES['total_current'], ANALOG_STATECLASSES['total_current'])
 
         total_soc = round(total_remain_capacity / total_full_capacity * 100, 1) 
         self.ha_comm.publish_sensor_state(total_soc, '%', "total_SOC")
-        self.ha_comm.publish_sensor_discovery("total_SOC", "%", icons['total_SOC'], deviceclasses['total_SOC'], stateclasses['total_SOC'])
+        self.ha_comm.publish_sensor_discovery("total_SOC", "%", ANALOG_ICONS['total_SOC'], ANALOG_DEVICECLASSES['total_SOC'], ANALOG_STATECLASSES['total_SOC'])
 
         total_soh = round(sum(d.get('view_SOH', 0) for d in analog_data) / total_packs_num, 1)
         self.ha_comm.publish_sensor_state(total_soh, '%', "total_SOH")
-        self.ha_comm.publish_sensor_discovery("total_SOH", "%", icons['total_SOH'], deviceclasses['total_SOH'], stateclasses['total_SOH'])
+        self.ha_comm.publish_sensor_discovery("total_SOH", "%", ANALOG_ICONS['total_SOH'], ANALOG_DEVICECLASSES['total_SOH'], ANALOG_STATECLASSES['total_SOH'])
 
         total_voltage = round(sum(d.get('view_voltage', 0) for d in analog_data) / total_packs_num, 2)
         self.ha_comm.publish_sensor_state(total_voltage, 'V', "total_voltage")
-        self.ha_comm.publish_sensor_discovery("total_voltage", "V", icons['total_voltage'], deviceclasses['total_voltage'], stateclasses['total_voltage'])
+        self.ha_comm.publish_sensor_discovery("total_voltage", "V", ANALOG_ICONS['total_voltage'], ANALOG_DEVICECLASSES['total_voltage'], ANALOG_STATECLASSES['total_voltage'])
 
         total_power = round(sum(d.get('view_power', 0) for d in analog_data),1)
         self.ha_comm.publish_sensor_state(total_power, 'kW', "total_power")
-        self.ha_comm.publish_sensor_discovery("total_power", "kW", icons['total_power'], deviceclasses['total_power'], stateclasses['total_power'])
+        self.ha_comm.publish_sensor_discovery("total_power", "kW", ANALOG_ICONS['total_power'], ANALOG_DEVICECLASSES['total_power'], ANALOG_STATECLASSES['total_power'])
 
         total_energy_charged = total_power * self.data_refresh_interval / 3600 * 1000 if total_power >= 0 else 0
         self.ha_comm.publish_sensor_state(total_energy_charged, 'Wh', "total_energy_charged")
-        self.ha_comm.publish_sensor_discovery("total_energy_charged", "Wh", icons['total_energy_charged'], deviceclasses['total_energy_charged'], stateclasses['total_energy_charged'])
+        self.ha_comm.publish_sensor_discovery("total_energy_charged", "Wh", ANALOG_ICONS['total_energy_charged'], ANALOG_DEVICECLASSES['total_energy_charged'], ANALOG_STATECLASSES['total_energy_charged'])
 
         total_energy_discharged = abs(total_power) * self.data_refresh_interval / 3600 * 1000 if total_power < 0 else 0
         self.ha_comm.publish_sensor_state(total_energy_discharged, 'Wh', "total_energy_discharged")
-        self.ha_comm.publish_sensor_discovery("total_energy_discharged", "Wh", icons['total_energy_discharged'], deviceclasses['total_energy_discharged'], stateclasses['total_energy_discharged'])
+        self.ha_comm.publish_sensor_discovery("total_energy_discharged", "Wh", ANALOG_ICONS['total_energy_discharged'], ANALOG_DEVICECLASSES['total_energy_discharged'], ANALOG_STATECLASSES['total_energy_discharged'])
 
         if self.if_random:
-            import random
             random_number = random.randint(1, 100)
             self.ha_comm.publish_sensor_state(random_number, 'A', "random_number")
-            self.ha_comm.publish_sensor_discovery("random_number", "A", icons['random_number'], deviceclasses['random_number'], stateclasses['random_number'])
+            self.ha_comm.publish_sensor_discovery("random_number", "A", ANALOG_ICONS['random_number'], ANALOG_DEVICECLASSES['random_number'], ANALOG_STATECLASSES['random_number'])
 
 
         pack_i = 0
 
         for pack in analog_data:
             pack_i = pack_i + 1
+            # Every entity of this pack shares the prefix, format it once
+            pack_prefix = f"pack_{pack_i:02}_"
             for key, value in pack.items():
-                unit = units.get(key, '')
-                icon = icons.get(key, '')
-                deviceclass = deviceclasses.get(key, '')
-                stateclass = stateclasses.get(key, '')
+                unit = ANALOG_UNITS.get(key, '')
+                icon = ANALOG_ICONS.get(key, '')
+                deviceclass = ANALOG_DEVICECLASSES.get(key, '')
+                stateclass = ANALOG_STATECLASSES.get(key, '')
 
                 if key == 'cell_voltages':
                     cell_i = 0
                     for cell_voltage in value:
                         cell_i = cell_i + 1
-                        self.ha_comm.publish_sensor_state(cell_voltage, unit, f"pack_{pack_i:02}_cell_voltage_{cell_i:02}")
-                        self.ha_comm.publish_sensor_discovery(f"pack_{pack_i:02}_cell_voltage_{cell_i:02}", unit, icon,deviceclass,stateclass)
+                        entity_id = f"{pack_prefix}cell_voltage_{cell_i:02}"
+                        self.ha_comm.publish_sensor_state(cell_voltage, unit, entity_id)
+                        self.ha_comm.publish_sensor_discovery(entity_id, unit, icon,deviceclass,stateclass)
                         
                 elif key == 'temperatures':
                     temperature_i = 0
                     for temperature in value:
                         temperature_i = temperature_i + 1
-                        self.ha_comm.publish_sensor_state(temperature, unit, f"pack_{pack_i:02}_temperature_{temperature_i:02}")
-                        self.ha_comm.publish_sensor_discovery(f"pack_{pack_i:02}_temperature_{temperature_i:02}", unit, icon,deviceclass,stateclass)
+                        entity_id = f"{pack_prefix}temperature_{temperature_i:02}"
+                        self.ha_comm.publish_sensor_state(temperature, unit, entity_id)
+                        self.ha_comm.publish_sensor_discovery(entity_id, unit, icon,deviceclass,stateclass)
                         
                 else:
-                    self.ha_comm.publish_sensor_state(value, unit, f"pack_{pack_i:02}_{key}")
-                    self.ha_comm.publish_sensor_discovery(f"pack_{pack_i:02}_{key}", unit, icon,deviceclass,stateclass)
+                    entity_id = f"{pack_prefix}{key}"
+                    self.ha_comm.publish_sensor_state(value, unit, entity_id)
+                    self.ha_comm.publish_sensor_discovery(entity_id, unit, icon,deviceclass,stateclass)
 
 
     def publish_warning_data_mqtt(self, pack_list):
@@ -1120,7 +1107,7 @@ class PACEBMS485:
                 if warn_data_single is not None:
                     break  # got a valid value, break the loop
                 retry_count += 1
-                self.logger.debug(f"retry {retry_count} to get warning data of pack: {pack_number}")
+                self.logger.debug("retry %s to get warning data of pack: %s", retry_count, pack_number)
 
             if retry_count == max_retries:
                 self.logger.error(f"Failed to get warning data of pack: {pack_number} after {max_retries} retries")
@@ -1137,7 +1124,9 @@ class PACEBMS485:
 
         for pack in warn_data:
             pack_i = pack_i + 1
-            self.logger.debug(f"pack_{pack_i:02}: {pack_i}")
+            # Every entity of this pack shares the prefix, format it once
+            pack_prefix = f"pack_{pack_i:02}_"
+            self.logger.debug("pack_%02d: %s", pack_i, pack_i)
             for key, value in pack.items():
                 unit = None
                 dclass = None
@@ -1146,50 +1135,28 @@ class PACEBMS485:
                     icon = "mdi:battery-heart-variant"
                     for cell_voltage_warning in value:
                         cell_i = cell_i + 1
-                        self.ha_comm.publish_warn_state(cell_voltage_warning, f"pack_{pack_i:02}_cell_voltage_warning_{cell_i:02}")
-                        self.ha_comm.publish_warn_discovery(f"pack_{pack_i:02}_cell_voltage_warning_{cell_i:02}",icon)
+                        entity_id = f"{pack_prefix}cell_voltage_warning_{cell_i:02}"
+                        self.ha_comm.publish_warn_state(cell_voltage_warning, entity_id)
+                        self.ha_comm.publish_warn_discovery(entity_id,icon)
                 elif key == 'temp_sensor_warnings':
                     temp_i = 0
                     icon = "mdi:battery-heart-variant"
                     for temp_sensor_warning in value:
                         temp_i = temp_i + 1
-                        self.ha_comm.publish_warn_state(temp_sensor_warning, f"pack_{pack_i:02}_temperature_warning_{temp_i:02}")
-                        self.ha_comm.publish_warn_discovery(f"pack_{pack_i:02}_temperature_warning_{temp_i:02}",icon)
-                elif key == 'protect_state_1':
-                    icon = "mdi:battery-alert"
-                    for sub_key, sub_value in value.items():
-                        self.ha_comm.publish_binary_sensor_state(sub_value, f"pack_{pack_i:02}_{sub_key}")
-                        self.ha_comm.publish_binary_sensor_discovery(f"pack_{pack_i:02}_{sub_key}",icon)
-                elif key == 'protect_state_2':
-                    icon = "mdi:battery-alert"
-                    for sub_key, sub_value in value.items():
-                        self.ha_comm.publish_binary_sensor_state(sub_value, f"pack_{pack_i:02}_{sub_key}")
-                        self.ha_comm.publish_binary_sensor_discovery(f"pack_{pack_i:02}_{sub_key}",icon)
-                elif key == 'instruction_state':
-                    icon = "mdi:battery-check"
-                    for sub_key, sub_value in value.items():
-                        self.ha_comm.publish_binary_sensor_state(sub_value, f"pack_{pack_i:02}_{sub_key}")
-                        self.ha_comm.publish_binary_sensor_discovery(f"pack_{pack_i:02}_{sub_key}",icon)
-                
-                elif key == 'fault_state':
-                    icon = "mdi:alert"
-                    for sub_key, sub_value in value.items():
-                        self.ha_comm.publish_binary_sensor_state(sub_value, f"pack_{pack_i:02}_{sub_key}")
-                        self.ha_comm.publish_binary_sensor_discovery(f"pack_{pack_i:02}_{sub_key}",icon)
-                elif key == 'warn_state_1':
-                    icon = "mdi:battery-heart-variant"
-                    for sub_key, sub_value in value.items():
-                        self.ha_comm.publish_binary_sensor_state(sub_value, f"pack_{pack_i:02}_{sub_key}")
-                        self.ha_comm.publish_binary_sensor_discovery(f"pack_{pack_i:02}_{sub_key}",icon)
-                elif key == 'warn_state_2':
-                    icon = "mdi:battery-heart-variant"
+                        entity_id = f"{pack_prefix}temperature_warning_{temp_i:02}"
+                        self.ha_comm.publish_warn_state(temp_sensor_warning, entity_id)
+                        self.ha_comm.publish_warn_discovery(entity_id,icon)
+                elif key in WARN_BINARY_ICONS:
+                    icon = WARN_BINARY_ICONS[key]
                     for sub_key, sub_value in value.items():
-                        self.ha_comm.publish_binary_sensor_state(sub_value, f"pack_{pack_i:02}_{sub_key}")
-                        self.ha_comm.publish_binary_sensor_discovery(f"pack_{pack_i:02}_{sub_key}",icon)
-                elif key not in ['cell_number', 'temp_sensor_number', 'control_state', 'balance_state_1', 'balance_state_2']:
+                        entity_id = f"{pack_prefix}{sub_key}"
+                        self.ha_comm.publish_binary_sensor_state(sub_value, entity_id)
+                        self.ha_comm.publish_binary_sensor_discovery(entity_id,icon)
+                elif key not in WARN_SKIPPED_KEYS:
                     icon = "mdi:battery-heart-variant"
-                    self.ha_comm.publish_warn_state(value, f"pack_{pack_i:02}_{key}")
-                    self.ha_comm.publish_warn_discovery(f"pack_{pack_i:02}_{key}",icon)
+                    entity_id = f"{pack_prefix}{key}"
+                    self.ha_comm.publish_warn_state(value, entity_id)
+                    self.ha_comm.publish_warn_discovery(entity_id,icon)
 
 
 
@@ -5,6 +5,10 @@ import json
 import sys
 import logging
 import threading
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from bms_comm import BMSCommunication
 from pacebms_rs232 import PACEBMS232
 from pacebms_rs485 import PACEBMS485
@@ -12,22 +16,29 @@ from tdtbms_rs232 import TDTBMS232
 from ha_rest_api import HA_REST_API
 from ha_mqtt import HA_MQTT
 
+# Configure logging once for the whole add-on, the classes only set the level of their own logger.
+# The level is switched to DEBUG below once the config is loaded
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
 # Define the load_config function
 def load_config():
     config_path = '/data/options.json'
     if os.path.exists(config_path):
-        print("Loading options.json")
+        logger.info("Loading options.json")
         try:
-            with open(config_path) as file:
-                config = json.load(file)
-                # print("Config: " + json.dumps(config))
+            with open(config_path, 'rb') as file:
+                # Prefer orjson when the image provides it, json.load handles bytes just as well
+                config = orjson.loads(file.read()) if orjson else json.load(file)
+                # logger.debug("Config: %s", config)
                 return config
         except Exception as e:
-            print("Error loading configuration: %s", str(e))
+            logger.error("Error loading configuration: %s", e)
             return None
     else:
-        print("No config file found.")
-        print("Please make a configuration in the panel")
+        logger.error("No config file found.")
+        logger.error("Please make a configuration in the panel")
         return None
 
 
@@ -55,6 +66,9 @@ ethernet_ip = config.get('bms_ip_address')
 ethernet_port = config.get('bms_ip_port')
 serial_port = config.get('bms_usb_port')
 baud_rate = config.get('bms_baud_rate')
+# Seconds to wait for a BMS response, installs configured before these options existed keep the old 3 s
+serial_timeout = config.get('bms_serial_timeout', 3)
+socket_timeout = config.get('bms_socket_timeout', 3)
 data_refresh_interval = config.get('data_refresh_interval')
 debug = config.get('debug')
 if_random = config.get('if_random')
@@ -71,17 +85,15 @@ device_info = {
 
 device_name = device_nameprocessed
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG if debug else logging.INFO,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+# Apply the configured log level
+logging.getLogger().setLevel(logging.DEBUG if debug else logging.INFO)
 
 # Declare bms_comm in the global scope
 bms_comm = None
 
 def initiate_bms_communication():
     global bms_comm
-    bms_comm = BMSCommunication(interface, serial_port, baud_rate, ethernet_ip, ethernet_port, buffer_size, debug)
+    bms_comm = BMSCommunication(interface, serial_port, baud_rate, ethernet_ip, ethernet_port, buffer_size, debug, serial_timeout, socket_timeout)
     return bms_comm.connect()
 
 def schedule_bms_reinit():
@@ -89,6 +101,16 @@ def schedule_bms_reinit():
     # threading.Timer(60, schedule_bms_reinit).start()
     # logger.info(f"schedule_bms_reinit start")
 
+def wait_next_cycle(next_tick):
+    # Sleep until the next poll is due, counted from the previous deadline so the poll time doesn't add up
+    next_tick += data_refresh_interval
+    delay = next_tick - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+        return next_tick
+    # The poll overran the interval, restart from now instead of bursting to catch up
+    return time.monotonic()
+
 def run():
 
     logger.info(f"interface: {interface}")
@@ -106,7 +128,6 @@ def run():
     if not mqtt_client:
         logger.info("HA Connection failed")
         return
-    mqtt_client.loop_start()
 
     # Schedule the BMS re-initialization
     schedule_bms_reinit()
@@ -126,6 +147,7 @@ def run():
             logger.info("PACE_LV BMS RS232 Working...")
 
             try:
+                next_tick = time.monotonic()
                 while True:  # Run continuously
                     
                     # Fetch analog and warning data every 5 seconds
@@ -133,7 +155,7 @@ def run():
                     time.sleep(1)
                     bms.publish_warning_data_mqtt()
 
-                    time.sleep(data_refresh_interval)  # Sleep for 5 seconds between each iteration
+                    next_tick = wait_next_cycle(next_tick)  # Poll every data_refresh_interval seconds
 
             except KeyboardInterrupt:
                 logger.info("Stopping the program...")
@@ -165,13 +187,14 @@ def run():
             if len(pack_list) > 0:
 
                 try:
+                    next_tick = time.monotonic()
                     while True:  # Run continuously
 
                         bms.publish_analog_data_mqtt(pack_list)
                         time.sleep(1)
                         bms.publish_warning_data_mqtt(pack_list)
                     
-                        time.sleep(data_refresh_interval)  # Sleep for 5 seconds between each iteration
+                        next_tick = wait_next_cycle(next_tick)  # Poll every data_refresh_interval seconds
 
                 except KeyboardInterrupt:
                     logger.info("Stopping the program...")
@@ -202,12 +225,13 @@ def run():
             if len(pack_list) > 0:
 
                 try:
+                    next_tick = time.monotonic()
                     while True:  # Run continuously
 
                         bms.publish_analog_data_mqtt(pack_list)
                         bms.publish_warning_data_mqtt(pack_list)
                     
-                        time.sleep(data_refresh_interval)  # Sleep for 5 seconds between each iteration
+                        next_tick = wait_next_cycle(next_tick)  # Poll every data_refresh_interval seconds
 
                 except KeyboardInterrupt:
                     logger.info("Stopping the program...")